@@ -1,62 +1,323 @@
+import contextlib
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import streamlit as st
 import gspread
+from gspread.utils import absolute_range_name, fill_gaps
+import numpy as np
 import pandas as pd
-import pytz
-import altair as alt
 from datetime import datetime
+from constants import (
+    EST, ACTIVITY_OPTIONS, EX_TYPES, MONTHS, LOG_HEADERS, LOG_NUMERIC_COLUMNS, PENDING_COLUMNS, MAIN_COLUMN_RANGES,
+    RATING_COLUMNS, EX_TYPE_COLUMNS, EX_MINS_COLUMNS, ACT_TYPE_COLUMNS, ACT_TIME_COLUMNS,
+    EXERCISE_CHART_SPEC, BREAKDOWN_CHART_SPEC, HEALTH_CHART_SPEC,
+)
 
 # --- 1. AUTHENTICATION ---
+# Seconds before a stalled Sheets request gives up, so it can't hold the shared write worker forever
+SHEETS_TIMEOUT = 30
+
 @st.cache_resource
 def get_gspread_client():
     info = st.secrets["gcp_service_account"]
     client = gspread.service_account_from_dict(info)
+    client.set_timeout(SHEETS_TIMEOUT)
     return client
 
-# --- 2. DATA WRITE FUNCTIONS ---
+# Spreadsheet ID remembered after the first open by title, so later processes can open by key
+SPREADSHEET_ID_PATH = Path(".cache") / "spreadsheet_id"
+
+def open_spreadsheet(client):
+    """Opens the log spreadsheet by key when the ID is known, otherwise by title."""
+    spreadsheet_id = st.secrets.get("spreadsheet_id")
+    if spreadsheet_id:
+        return client.open_by_key(spreadsheet_id)
+    if SPREADSHEET_ID_PATH.exists():
+        try:
+            return client.open_by_key(SPREADSHEET_ID_PATH.read_text().strip())
+        except (gspread.SpreadsheetNotFound, PermissionError):
+            pass  # Stale ID (recreated or unshared spreadsheet); fall back to the title search
+    spreadsheet = client.open("Daily Activity Log")
+    with contextlib.suppress(OSError):
+        SPREADSHEET_ID_PATH.parent.mkdir(exist_ok=True)
+        SPREADSHEET_ID_PATH.write_text(spreadsheet.id)
+    return spreadsheet
+
+@st.cache_resource
+def get_sheets():
+    """Returns the spreadsheet plus its main and Temp_Activities tabs, set up once per process."""
+    spreadsheet = open_spreadsheet(get_gspread_client())
+
+    # One metadata fetch covers both tabs, rather than one each for sheet1 and worksheet()
+    worksheets = spreadsheet.worksheets()
+    sheet = worksheets[0]
+    # One values read per process; written at A1, since append_row would land below any existing rows
+    if not sheet.row_values(1):
+        sheet.update(values=[list(LOG_HEADERS)], range_name="A1")
+    temp_sheet = next((ws for ws in worksheets if ws.title == "Temp_Activities"), None)
+    if temp_sheet is None:
+        temp_sheet = spreadsheet.add_worksheet("Temp_Activities", rows=100, cols=3)
+        temp_sheet.append_row(list(PENDING_COLUMNS))
+    return spreadsheet, sheet, temp_sheet
+
+# --- 2. DATA READ/WRITE FUNCTIONS ---
+# Parsed log kept on local disk between runs, and how long (seconds) before it is fully resynced
+LOG_SNAPSHOT_PATH = Path(".cache") / "daily_log.parquet"
+LOG_SNAPSHOT_MAX_AGE = 3600
+
+def padded_values(value_range, rows=None, cols=None):
+    """Returns a batchGet value range as a rectangular list of rows, like get_all_values()."""
+    return fill_gaps(value_range.get("values", []), rows=rows, cols=cols)
+
+def fetch_main_rows(first_row=1):
+    """Fetches the main-tab columns from first_row down in one batchGet, as a rectangular list of rows."""
+    spreadsheet, sheet, _ = get_sheets()
+    resp = spreadsheet.values_batch_get(
+        [absolute_range_name(sheet.title, f"{first_col}{first_row}:{last_col}") for first_col, last_col, _ in MAIN_COLUMN_RANGES],
+        # Numbers come back as JSON numbers; any date-typed cells still come back as text
+        params={"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "FORMATTED_STRING"},
+    )
+    value_ranges = resp["valueRanges"]
+    # Each range drops its own trailing blank rows, so pad all to the longest before stitching
+    n_rows = max(len(r.get("values", [])) for r in value_ranges)
+    parts = [padded_values(r, n_rows, width) for r, (_, _, width) in zip(value_ranges, MAIN_COLUMN_RANGES)]
+    return [sum(row_parts, []) for row_parts in zip(*parts)]
+
+def parse_log_df(rows):
+    """Builds the typed log DataFrame from the header row and data rows."""
+    df = pd.DataFrame(rows[1:], columns=rows[0])
+    df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+    # Unformatted reads return a number typed into a text column as a number; keep these columns all str
+    text_cols = [col for col in EX_TYPE_COLUMNS + ACT_TYPE_COLUMNS + ('Timestamp',) if col in df.columns]
+    df[text_cols] = df[text_cols].astype(str)
+    numeric_cols = [col for col in LOG_NUMERIC_COLUMNS if col in df.columns]
+    for col in numeric_cols:
+        # Unformatted reads are usually numeric already; only blanks or text-stored numbers need coercing
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    # Ratings are whole numbers 1-5 and minutes/miles are small, so narrow dtypes lose nothing
+    return df.astype(dict.fromkeys(numeric_cols, 'float32') | dict.fromkeys(RATING_COLUMNS, 'int8'))
+
+def categorize_types(df):
+    """Stores the Ex*/Act* _Type columns as pandas categoricals, one shared dtype per family."""
+    for type_cols, options in ((EX_TYPE_COLUMNS, EX_TYPES), (ACT_TYPE_COLUMNS, ACTIVITY_OPTIONS)):
+        cols = list(type_cols)
+        # Values outside today's option lists (older or hand-typed rows) are kept as extra categories
+        extra = sorted(set(pd.unique(df[cols].to_numpy().ravel())) - set(options), key=str)
+        df[cols] = df[cols].astype(pd.CategoricalDtype(list(options) + extra))
+    return df
+
+@st.cache_resource(ttl=300)
+def get_log_version():
+    """Returns a token that changes every five minutes and after each save; every log cache is keyed on it."""
+    return time.time_ns()
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_log_df(version):
+    """Returns the typed log DataFrame for a get_log_version() token, fetching only rows added since the local snapshot."""
+    if LOG_SNAPSHOT_PATH.exists() and time.time() - LOG_SNAPSHOT_PATH.stat().st_mtime < LOG_SNAPSHOT_MAX_AGE:
+        snapshot = pd.read_parquet(LOG_SNAPSHOT_PATH)
+        # The snapshot's last row is re-fetched as a check that the rows above it are unchanged
+        rows = fetch_main_rows(first_row=len(snapshot) + 1)
+        if rows and len(rows[0]) == len(snapshot.columns) and str(rows[0][-1]) == snapshot.iloc[-1, -1]:
+            if len(rows) == 1:
+                return snapshot
+            new_rows = parse_log_df([list(snapshot.columns)] + rows[1:])
+            return categorize_types(pd.concat([snapshot, new_rows], ignore_index=True))
+
+    rows = fetch_main_rows()
+    if len(rows) < 2:
+        return pd.DataFrame()
+    df = categorize_types(parse_log_df(rows))
+    # Renamed into place so other sessions never read a partial file; a failed write only costs the snapshot
+    with contextlib.suppress(OSError, ValueError, TypeError):
+        LOG_SNAPSHOT_PATH.parent.mkdir(exist_ok=True)
+        tmp_path = LOG_SNAPSHOT_PATH.with_suffix(".tmp")
+        df.to_parquet(tmp_path)
+        tmp_path.replace(LOG_SNAPSHOT_PATH)
+    return df
+
+@st.cache_data(max_entries=12, show_spinner=False)
+def get_month_slice(month, version):
+    """Returns the log rows dated in the given month (1-12), with a Day (day-of-month) column."""
+    df = load_log_df(version)
+    if df.empty:
+        return df
+    df = df.loc[df['Date'].dt.month == month]
+    return df.assign(Day=df['Date'].dt.day)
+
+@st.cache_data(max_entries=12, show_spinner=False)
+def get_exercise_plot_df(month, version):
+    """Returns total exercise minutes per (Day, Type) in the month, for the exercise chart."""
+    df = get_month_slice(month, version)
+    # Stack Ex1 rows then Ex2 rows straight from the column arrays
+    type_dtype = df[EX_TYPE_COLUMNS[0]].dtype
+    # Codes only line up if every column has the same categories in the same order; dtype == ignores order
+    if all(isinstance(df[col].dtype, pd.CategoricalDtype) and df[col].cat.categories.equals(type_dtype.categories) for col in EX_TYPE_COLUMNS):
+        types = pd.Categorical.from_codes(np.concatenate([df[col].cat.codes.to_numpy() for col in EX_TYPE_COLUMNS]), dtype=type_dtype)
+    else:
+        types = pd.concat([df[col] for col in EX_TYPE_COLUMNS], ignore_index=True)
+    df_ex_plot = pd.DataFrame({
+        'Day': np.tile(df['Day'].to_numpy(), len(EX_TYPE_COLUMNS)),
+        'Type': types,
+        'Mins': np.concatenate([df[col].to_numpy() for col in EX_MINS_COLUMNS]),
+    })
+    df_ex_plot = df_ex_plot[df_ex_plot['Type'] != "None"]
+    # Vega-Lite orders the Day axis and color legend itself, so the groups are left unsorted
+    return df_ex_plot.groupby(['Day', 'Type'], as_index=False, observed=True, sort=False)['Mins'].sum()
+
+@st.cache_data(max_entries=12, show_spinner=False)
+def get_activity_plot_df(month, version):
+    """Returns total minutes per (Date, Day, Activity) in the month, for the breakdown chart."""
+    df = get_month_slice(month, version)
+    # Both melts stack every Act1 row, then every Act2 row, and so on, so their positions line up
+    df_long = df.melt(id_vars=['Date', 'Day'], value_vars=ACT_TYPE_COLUMNS, value_name='Activity').drop(columns='variable')
+    df_long['Mins'] = df.melt(value_vars=ACT_TIME_COLUMNS, value_name='Mins')['Mins']
+    df_long = df_long[df_long['Activity'] != "None"]
+    return df_long.groupby(['Date', 'Day', 'Activity'], as_index=False, observed=True, sort=False)['Mins'].sum()
+
+def clear_log_caches():
+    """Drops every cached view of the log so the next rerun reflects a new save."""
+    get_log_version.clear()
+    load_log_df.clear()
+    get_month_slice.clear()
+    get_exercise_plot_df.clear()
+    get_activity_plot_df.clear()
+
+@st.cache_resource
+def get_write_pool():
+    """Background worker for Sheets writes; a single thread keeps saved rows in submit order."""
+    return ThreadPoolExecutor(max_workers=1)
+
+def run_in_order(func, *args):
+    """Runs a Temp_Activities call on the write worker and waits for it, so it lands after any queued save."""
+    # Raises TimeoutError into the caller's error message if the queue ahead of it is stuck
+    return get_write_pool().submit(func, *args).result(timeout=3 * SHEETS_TIMEOUT)
+
+def append_and_read(temp_sheet, new_row):
+    """Worker side of sync_pending(): the optional append and the read run back to back."""
+    if new_row is not None:
+        temp_sheet.append_row(new_row)
+    return temp_sheet.get_all_values()
+
+def held_temp_rows():
+    """Counts the leading Temp_Activities rows still held by this session's failed saves."""
+    return st.session_state.get("unsaved_rows", 0) + sum(
+        temp_rows for _, temp_rows, future in st.session_state.get("saving", [])
+        if future.done() and future.exception() is not None
+    )
+
+def sync_pending(new_row=None):
+    """Appends new_row to the Temp_Activities tab if given, then reloads the session's pending list from the tab."""
+    _, _, temp_sheet = get_sheets()
+    rows = [tuple(row[:3]) for row in run_in_order(append_and_read, temp_sheet, new_row)[1:]]
+    # Queued saves have all run by now, so only failed ones still hold rows at the top
+    st.session_state["pending"] = rows[held_temp_rows():]
+
+def get_pending():
+    """Returns this session's pending activities, seeded once from the Temp_Activities tab."""
+    if "pending" not in st.session_state:
+        sync_pending()
+    return st.session_state["pending"]
+
 def add_to_temp_storage(activity, duration, notes):
-    """Saves a single activity row to the Temp_Activities tab for persistence."""
+    """Saves a single activity row to the Temp_Activities tab and refreshes the session list from it."""
     try:
-        client = get_gspread_client()
-        temp_sheet = client.open("Daily Activity Log").worksheet("Temp_Activities")
-        temp_sheet.append_row([activity, duration, notes])
+        # Refreshing from the tab also picks up activities added from another tab or device
+        sync_pending([activity, duration, notes])
     except Exception as e:
         st.error(f"Error saving to temporary storage: {e}")
 
-def log_activity_data(entry_data):
-    """Saves the final combined daily entry to the main Master tab."""
+def to_cell(value):
+    """Wraps a value as Sheets CellData, stored as-is like append_row's RAW input."""
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+def send_entries(spreadsheet, requests, temp_sheet_id, unsaved_rows, new_rows, earlier):
+    """Worker side of log_activity_data(): adds the Temp_Activities deletes once earlier saves have run."""
+    # Rows of earlier saves that failed sit between the retried rows at the top and the new ones
+    skipped = sum(temp_rows for temp_rows, future in earlier if future.exception() is not None)
+    # The lower range goes first, so deleting it doesn't shift the one above
+    for start, count in ((1 + unsaved_rows + skipped, new_rows), (1, unsaved_rows)):
+        if count:
+            requests.append({"deleteDimension": {
+                "range": {"sheetId": temp_sheet_id, "dimension": "ROWS", "startIndex": start, "endIndex": start + count},
+            }})
+    return spreadsheet.batch_update({"requests": requests})
+
+def log_activity_data(entries, unsaved_rows, new_rows=0):
+    """Queues final combined daily entries for the main Master tab and deletes the Temp_Activities rows they used."""
     try:
-        client = get_gspread_client()
-        spreadsheet = client.open("Daily Activity Log")
-        sheet = spreadsheet.sheet1
-        sheet.append_row(entry_data)
-        st.success(f"Successfully saved entry for {entry_data[0]}!")
+        spreadsheet, sheet, temp_sheet = get_sheets()
+        requests = [{"appendCells": {
+            "sheetId": sheet.id,
+            "rows": [{"values": [to_cell(v) for v in entry_data]} for entry_data in entries],
+            "fields": "userEnteredValue",
+        }}]
+        saving = st.session_state.setdefault("saving", [])
+        earlier = [(temp_rows, future) for _, temp_rows, future in saving]
+        future = get_write_pool().submit(send_entries, spreadsheet, requests, temp_sheet.id, unsaved_rows, new_rows, earlier)
+        saving.append((entries, unsaved_rows + new_rows, future))
+        return True
     except Exception as e:
         st.error(f"Google Sheets Connection Error: {e}")
+        return False
+
+def check_saved_entries():
+    """Reports background saves that finished since the last rerun; failed entries are kept for a retry."""
+    still_saving = []
+    for entries, temp_rows, future in st.session_state.get("saving", []):
+        if not future.done():
+            still_saving.append((entries, temp_rows, future))
+        elif future.exception() is None:
+            clear_log_caches()
+            st.success(f"Successfully saved entry for {', '.join(e[0] for e in entries)}!")
+        else:
+            st.session_state.setdefault("unsaved", []).extend(entries)
+            st.session_state["unsaved_rows"] = st.session_state.get("unsaved_rows", 0) + temp_rows
+            st.error(f"Google Sheets Connection Error: {future.exception()}")
+    st.session_state["saving"] = still_saving
+    if still_saving:
+        st.info("Saving your entry in the background...")
+
+def take_unsaved():
+    """Pops entries whose save failed, with how many leading Temp_Activities rows they still hold."""
+    entries = st.session_state.pop("unsaved", [])
+    temp_rows = st.session_state.pop("unsaved_rows", 0)
+    # Saves that failed since check_saved_entries() ran are taken too, so each is retried once
+    still_saving = []
+    for failed_entries, failed_rows, future in st.session_state.get("saving", []):
+        if future.done() and future.exception() is not None:
+            entries = entries + failed_entries
+            temp_rows += failed_rows
+        else:
+            still_saving.append((failed_entries, failed_rows, future))
+    st.session_state["saving"] = still_saving
+    return entries, temp_rows
+
+def restore_unsaved(entries, temp_rows):
+    """Puts back entries from take_unsaved() that could not be queued."""
+    st.session_state["unsaved"] = entries
+    st.session_state["unsaved_rows"] = temp_rows
 
 # --- 3. UI - DAILY TIME TRACKING (PERSISTENT) ---
 st.title("☀️ Daily Activity Log")
 
+check_saved_entries()
+if st.session_state.get("unsaved") and st.button("Retry Unsaved Entries"):
+    unsaved, unsaved_rows = take_unsaved()
+    if not log_activity_data(unsaved, unsaved_rows):
+        restore_unsaved(unsaved, unsaved_rows)
+    st.rerun()
+
 st.divider()
 st.subheader("⏰ Daily Time Tracking")
 
-# Fixed Colors for Exercise Chart only
-exercise_colors = {
-    "Swim": "#72B7B2", "Yoga": "#76A04F", "Run": "#E15759", 
-    "Cycle": "#4E79A7", "Elliptical": "#F28E2B", "Strength": "#636363", "Other": "#BAB0AC"
-}
-
-# Fixed Colors for Activity Chart only
-daily_activity_colors = {
-    "Work": "#4E79A7", "Meal Prep/clean": "#E15759", "Meal Time": "#F28E2B",
-    "Maintenance": "#76A04F", "Read/Reflect": "#EDC948", "Nap/Relax": "#B07AA1",
-    "Friend Time": "#FF9DA7", "Entertainment": "#9C755F", "Work-Calls": "#4E79A7", 
-    "Hobby": "#BAB0AC", "Driving": "#72B7B2"
-}
-
-activity_options = ["None", "Work", "Meal Prep/clean", "Meal Time", "Maintenance", "Exercise", "Read/Reflect", "Nap/Relax", "Friend Time", "Entertainment", "Work-Calls", "Hobby", "Driving"]
-
 cols = st.columns([1.5, 1, 3.5])
-act_type = cols[0].selectbox("Activity Type", activity_options, key="ui_act_type")
+act_type = cols[0].selectbox("Activity Type", ACTIVITY_OPTIONS, key="ui_act_type")
 act_mins = cols[1].number_input("Mins", min_value=0, step=5, key="ui_act_mins")
 act_text = cols[2].text_input("Notes/Details", key="ui_act_notes")
 
@@ -65,28 +326,28 @@ btn_col1, btn_col2 = st.columns(2)
 if btn_col1.button("Add Activity to List"):
     if act_type != "None":
         add_to_temp_storage(act_type, act_mins, act_text)
-        st.rerun()
     else:
         st.warning("Please select an activity type.")
 
 if btn_col2.button("Clear List"):
     try:
-        client = get_gspread_client()
-        temp_sheet = client.open("Daily Activity Log").worksheet("Temp_Activities")
-        temp_sheet.batch_clear(['A2:C100'])
-        st.rerun()
+        _, _, temp_sheet = get_sheets()
+        run_in_order(temp_sheet.batch_clear, ['A2:C'])
+        st.session_state["pending"] = []
+        # Unsaved entries already carry their activities; their rows are gone now
+        unsaved, _ = take_unsaved()
+        if unsaved:
+            restore_unsaved(unsaved, 0)
     except Exception as e:
         st.error(f"Error clearing temporary storage: {e}")
 
-# Display Current Pending List
+# Display Current Pending List (drawn after the buttons, so it already reflects an Add or Clear this run)
 try:
-    client = get_gspread_client()
-    temp_sheet = client.open("Daily Activity Log").worksheet("Temp_Activities")
-    temp_rows = temp_sheet.get_all_values()
+    pending = get_pending()
     
-    if len(temp_rows) > 1:
+    if pending:
         st.write("### 📝 Pending Activities (Stored in Cloud)")
-        pending_df = pd.DataFrame(temp_rows[1:], columns=temp_rows[0])
+        pending_df = pd.DataFrame(pending, columns=PENDING_COLUMNS)
         st.dataframe(pending_df, use_container_width=True)
     else:
         st.info("No pending activities. Add one above to get started!")
@@ -106,14 +367,14 @@ with st.form("main_activity_form", clear_on_submit=True):
     ex_col1, ex_col2 = st.columns(2)
     with ex_col1:
         st.subheader("Exercise 1")
-        ex1_type = st.selectbox("Type", ["None", "Swim", "Run", "Cycle", "Yoga", "Elliptical", "Strength", "Other"], key="ex1_sel")
+        ex1_type = st.selectbox("Type", EX_TYPES, key="ex1_sel")
         m1_col1, m1_col2 = st.columns(2)
         ex1_mins = m1_col1.number_input("Minutes", min_value=0.0, step=5.0, key="ex1_m")
         ex1_miles = m1_col2.number_input("Miles", min_value=0.0, step=0.1, key="ex1_mi")
 
     with ex_col2:
         st.subheader("Exercise 2")
-        ex2_type = st.selectbox("Type", ["None", "Swim", "Run", "Cycle", "Yoga", "Elliptical", "Strength", "Other"], key="ex2_sel")
+        ex2_type = st.selectbox("Type", EX_TYPES, key="ex2_sel")
         m2_col1, m2_col2 = st.columns(2)
         ex2_mins = m2_col1.number_input("Minutes", min_value=0.0, step=5.0, key="ex2_m")
         ex2_miles = m2_col2.number_input("Miles", min_value=0.0, step=0.1, key="ex2_mi")
@@ -124,12 +385,12 @@ with st.form("main_activity_form", clear_on_submit=True):
 
 # --- 5. LOGIC AFTER SUBMIT ---
 if submit:
-    est = pytz.timezone('US/Eastern')
-    timestamp_est = datetime.now(est).strftime("%Y-%m-%d %H:%M:%S")
+    timestamp_est = datetime.now(EST).strftime("%Y-%m-%d %H:%M:%S")
 
-    client = get_gspread_client()
-    temp_sheet = client.open("Daily Activity Log").worksheet("Temp_Activities")
-    temp_rows = temp_sheet.get_all_values()[1:] 
+    # The list shown above, kept in step with the tab on every Add; an entry has 10 slots,
+    # so anything past the tenth stays pending for the next entry
+    pending = get_pending()
+    temp_rows, rest = pending[:10], pending[10:]
 
     new_entry = [
         date_val.strftime("%Y-%m-%d"),
@@ -140,87 +401,54 @@ if submit:
         insights
     ]
 
-    final_activities = []
-    for i in range(10):
-        if i < len(temp_rows):
-            row = temp_rows[i]
-            final_activities.extend([row[0], row[1], row[2]])
-        else:
-            final_activities.extend(["None", 0, ""])
+    # Exactly 10 activity slots: pending rows first, then empty placeholders
+    padded = temp_rows + [("None", 0, "")] * (10 - len(temp_rows))
+    final_activities = list(itertools.chain.from_iterable(padded))
 
     new_entry.extend(final_activities)
     new_entry.append(timestamp_est)
 
-    log_activity_data(new_entry)
-    temp_sheet.batch_clear(['A2:C100'])
+    # Entries that failed to save earlier go out in the same request
+    unsaved, unsaved_rows = take_unsaved()
+    if log_activity_data(unsaved + [new_entry], unsaved_rows, len(temp_rows)):
+        st.session_state["pending"] = rest
+    else:
+        restore_unsaved(unsaved, unsaved_rows)
     st.rerun()
 
 # --- 6. VISUAL ANALYSIS ---
-st.divider()
-st.subheader("Visual Analysis")
+@st.fragment
+def render_analysis():
+    """Draws the Visual Analysis section; its own widgets rerun only this fragment, not the whole app."""
+    with st.expander("📊 Visual Analysis"):
+        # Expander bodies run even while collapsed, so the fetch and charts wait for this toggle
+        if st.toggle("Load charts", key="viz_open"):
+            try:
+                selected_month = st.selectbox("Select Month to Review", MONTHS, index=datetime.now().month - 1, key="viz_month")
+                month = MONTHS.index(selected_month) + 1
+                # One version for all three charts, so they are drawn from the same load
+                version = get_log_version()
+                df_filtered = get_month_slice(month, version)
 
-try:
-    client = get_gspread_client()
-    sheet = client.open("Daily Activity Log").sheet1
-    all_values = sheet.get_all_values()
-    
-    if len(all_values) > 1:
-        df = pd.DataFrame(all_values[1:], columns=all_values[0])
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Numeric cleanup
-        for col in ['Ex1_Mins', 'Ex2_Mins', 'Satisfaction', 'Neuralgia']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+                if not df_filtered.empty:
+                    # CHART 1: Exercise Minutes
+                    st.write("### Exercise Minutes")
+                    st.vega_lite_chart(get_exercise_plot_df(month, version), dict(EXERCISE_CHART_SPEC), use_container_width=True)
+
+                    # CHART 2: Daily Time Breakdown (THE FIXED STACKED BAR)
+                    st.write("### Daily Time Breakdown")
+                    breakdown_encoding = dict(BREAKDOWN_CHART_SPEC["encoding"], x={"field": "Day", "type": "ordinal", "title": f"Day of {selected_month}"})
+                    st.vega_lite_chart(get_activity_plot_df(month, version), dict(BREAKDOWN_CHART_SPEC, encoding=breakdown_encoding), use_container_width=True)
 
-        months = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-        selected_month = st.selectbox("Select Month to Review", months, index=datetime.now().month - 1)
-        df_filtered = df[df['Date'].dt.month_name() == selected_month].copy()
-
-        if not df_filtered.empty:
-            # Re-shaping data for charts
-            hist_list = []
-            for i in range(1, 11):
-                temp = df_filtered[['Date', f'Act{i}_Type', f'Act{i}_Time', f'Act{i}_Text']].rename(
-                    columns={f'Act{i}_Type': 'Activity', f'Act{i}_Time': 'Mins', f'Act{i}_Text': 'Notes'}
-                )
-                hist_list.append(temp)
-            df_long = pd.concat(hist_list)
-            df_long = df_long[df_long['Activity'] != "None"]
-            df_long['Mins'] = pd.to_numeric(df_long['Mins'], errors='coerce').fillna(0)
-
-            # CHART 1: Exercise Minutes
-            st.write("### Exercise Minutes")
-            ex1_sub = df_filtered[['Date', 'Ex1_Type', 'Ex1_Mins']].rename(columns={'Ex1_Type': 'Type', 'Ex1_Mins': 'Mins'})
-            ex2_sub = df_filtered[['Date', 'Ex2_Type', 'Ex2_Mins']].rename(columns={'Ex2_Type': 'Type', 'Ex2_Mins': 'Mins'})
-            df_ex_plot = pd.concat([ex1_sub, ex2_sub])
-            df_ex_plot = df_ex_plot[df_ex_plot['Type'] != "None"]
-            df_ex_plot['Mins'] = pd.to_numeric(df_ex_plot['Mins'], errors='coerce').fillna(0)
-
-            exercise_chart = alt.Chart(df_ex_plot).mark_bar().encode(
-                x='date(Date):O', y='sum(Mins):Q', 
-                color=alt.Color('Type:N', scale=alt.Scale(domain=list(exercise_colors.keys()), range=list(exercise_colors.values())))
-            ).properties(height=300)
-            st.altair_chart(exercise_chart, use_container_width=True)
-
-            # CHART 2: Daily Time Breakdown (THE FIXED STACKED BAR)
-            st.write("### Daily Time Breakdown")
-            breakdown_chart = alt.Chart(df_long).mark_bar(opacity=0.8).encode(
-                x=alt.X('date(Date):O', title=f'Day of {selected_month}'),
-                y=alt.Y('Mins:Q', aggregate='sum', title='Total Minutes'),
-                color=alt.Color('Activity:N', scale=alt.Scale(domain=list(daily_activity_colors.keys()), range=list(daily_activity_colors.values()))),
-                tooltip=['Date', 'Activity', 'Mins']
-            ).properties(height=300)
-            st.altair_chart(breakdown_chart, use_container_width=True)
-
-            # CHART 3: Health History
-            st.write("### Satisfaction & Neuralgia Levels")
-            health_chart = alt.Chart(df_filtered).transform_fold(
-                ['Satisfaction', 'Neuralgia'], as_=['Metric', 'Value']
-            ).mark_line(point=True).encode(
-                x='date(Date):O', y=alt.Y('Value:Q', scale=alt.Scale(domain=[1, 5])),
-                color=alt.Color('Metric:N', scale=alt.Scale(range=['#636EFA', '#EF553B']))
-            ).properties(height=250)
-            st.altair_chart(health_chart, use_container_width=True)
-           
-except Exception as e:
-    st.info("Log your daily data to unlock historical charts!")
+                    # CHART 3: Health History
+                    st.write("### Satisfaction & Neuralgia Levels")
+                    df_health = df_filtered.melt(
+                        id_vars='Day', value_vars=RATING_COLUMNS, var_name='Metric', value_name='Value'
+                    )
+                    st.vega_lite_chart(df_health, dict(HEALTH_CHART_SPEC), use_container_width=True)
+
+            except Exception as e:
+                st.info("Log your daily data to unlock historical charts!")
+
+st.divider()
+render_analysis()
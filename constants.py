@@ -0,0 +1,105 @@
+"""Fixed option lists and chart colors for app.py.
+
+Streamlit re-executes app.py on every rerun, but an imported module is only evaluated
+once per process, so these literals are built once instead of on every widget change.
+"""
+from types import MappingProxyType
+from zoneinfo import ZoneInfo
+
+# Timezone for the saved Timestamp column (same rules as the legacy US/Eastern alias)
+EST = ZoneInfo("America/New_York")
+
+ACTIVITY_OPTIONS = ("None", "Work", "Meal Prep/clean", "Meal Time", "Maintenance", "Exercise", "Read/Reflect", "Nap/Relax", "Friend Time", "Entertainment", "Work-Calls", "Hobby", "Driving")
+
+EX_TYPES = ("None", "Swim", "Run", "Cycle", "Yoga", "Elliptical", "Strength", "Other")
+
+# Main-tab header row, in the order entries are written
+LOG_HEADERS = (
+    ("Date", "Satisfaction", "Neuralgia",
+     "Ex1_Type", "Ex1_Mins", "Ex1_Miles", "Ex2_Type", "Ex2_Mins", "Ex2_Miles", "Insights")
+    + tuple(f"Act{i}_{field}" for i in range(1, 11) for field in ("Type", "Time", "Text"))
+    + ("Timestamp",)
+)
+
+# Main-tab columns fetched for the charts, as (first, last, width), all in one batchGet:
+# Date..Ex1_Mins, Ex2_Type..Ex2_Mins, each Act slot's Type and Time, and Timestamp last so
+# incremental fetches can check the rows they follow on from. Insights, the Miles columns and
+# the Act*_Text notes are never charted, so they are not fetched.
+MAIN_COLUMN_RANGES = (
+    ("A", "E", 5), ("G", "H", 2),
+    ("K", "L", 2), ("N", "O", 2), ("Q", "R", 2), ("T", "U", 2), ("W", "X", 2),
+    ("Z", "AA", 2), ("AC", "AD", 2), ("AF", "AG", 2), ("AI", "AJ", 2), ("AL", "AM", 2),
+    ("AO", "AO", 1),
+)
+
+# Column groups the charts read together
+RATING_COLUMNS = ("Satisfaction", "Neuralgia")
+EX_TYPE_COLUMNS = ("Ex1_Type", "Ex2_Type")
+EX_MINS_COLUMNS = ("Ex1_Mins", "Ex2_Mins")
+ACT_TYPE_COLUMNS = tuple(f"Act{i}_Type" for i in range(1, 11))
+ACT_TIME_COLUMNS = tuple(f"Act{i}_Time" for i in range(1, 11))
+
+# Temp_Activities header row, also the pending-list table columns
+PENDING_COLUMNS = ("Activity", "Mins", "Notes")
+
+# Main-tab columns holding numbers; everything else is text
+LOG_NUMERIC_COLUMNS = RATING_COLUMNS + ("Ex1_Mins", "Ex1_Miles", "Ex2_Mins", "Ex2_Miles") + ACT_TIME_COLUMNS
+
+MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December")
+
+# Fixed Colors for Exercise Chart only
+EXERCISE_COLORS = MappingProxyType({
+    "Swim": "#72B7B2", "Yoga": "#76A04F", "Run": "#E15759",
+    "Cycle": "#4E79A7", "Elliptical": "#F28E2B", "Strength": "#636363", "Other": "#BAB0AC"
+})
+EXERCISE_COLOR_DOMAIN = list(EXERCISE_COLORS)
+EXERCISE_COLOR_RANGE = list(EXERCISE_COLORS.values())
+
+# Fixed Colors for Activity Chart only
+DAILY_ACTIVITY_COLORS = MappingProxyType({
+    "Work": "#4E79A7", "Meal Prep/clean": "#E15759", "Meal Time": "#F28E2B",
+    "Maintenance": "#76A04F", "Read/Reflect": "#EDC948", "Nap/Relax": "#B07AA1",
+    "Friend Time": "#FF9DA7", "Entertainment": "#9C755F", "Work-Calls": "#4E79A7",
+    "Hobby": "#BAB0AC", "Driving": "#72B7B2"
+})
+DAILY_ACTIVITY_COLOR_DOMAIN = list(DAILY_ACTIVITY_COLORS)
+DAILY_ACTIVITY_COLOR_RANGE = list(DAILY_ACTIVITY_COLORS.values())
+
+# Vega-Lite specs for the three Visual Analysis charts, written out directly rather than built
+# through Altair's encoding objects on every rerun. Data is passed alongside, not inlined, and
+# the bar charts receive frames already summed per segment, so they carry no aggregate.
+# Callers pass a shallow copy, and copy an encoding before changing a field such as an axis title.
+EXERCISE_CHART_SPEC = {
+    "mark": "bar",
+    "height": 300,
+    "encoding": {
+        "x": {"field": "Day", "type": "ordinal"},
+        "y": {"field": "Mins", "type": "quantitative", "title": "Sum of Mins"},
+        "color": {"field": "Type", "type": "nominal", "scale": {"domain": EXERCISE_COLOR_DOMAIN, "range": EXERCISE_COLOR_RANGE}},
+    },
+}
+
+BREAKDOWN_CHART_SPEC = {
+    "mark": {"type": "bar", "opacity": 0.8},
+    "height": 300,
+    "encoding": {
+        "x": {"field": "Day", "type": "ordinal"},
+        "y": {"field": "Mins", "type": "quantitative", "title": "Total Minutes"},
+        "color": {"field": "Activity", "type": "nominal", "scale": {"domain": DAILY_ACTIVITY_COLOR_DOMAIN, "range": DAILY_ACTIVITY_COLOR_RANGE}},
+        "tooltip": [
+            {"field": "Date", "type": "temporal"},
+            {"field": "Activity", "type": "nominal"},
+            {"field": "Mins", "type": "quantitative"},
+        ],
+    },
+}
+
+HEALTH_CHART_SPEC = {
+    "mark": {"type": "line", "point": True},
+    "height": 250,
+    "encoding": {
+        "x": {"field": "Day", "type": "ordinal"},
+        "y": {"field": "Value", "type": "quantitative", "scale": {"domain": [1, 5]}},
+        "color": {"field": "Metric", "type": "nominal", "scale": {"range": ["#636EFA", "#EF553B"]}},
+    },
+}